@@ -1,5 +1,6 @@
 import jax.numpy as jnp
 import jax
+import numpy as np
 from jax import random
 from functools import partial
 import nux.util as util
@@ -7,6 +8,49 @@ from pathlib import Path
 import os
 import tensorflow_datasets as tfds
 from experiments.datasetdownload import download_file_from_google_drive
+import collections
+import itertools
+
+def get_device_put(batch_axis=0):
+  devices = jax.local_devices()
+  if len(devices) == 1:
+    return jax.device_put
+
+  # jax.sharding only exists in newer versions of JAX
+  try:
+    from jax.sharding import Mesh, NamedSharding, PartitionSpec
+  except ImportError:
+    return jax.device_put
+
+  # Split the batch axis over the local devices.  The compiled training loop
+  # is then partitioned by XLA, which inserts the gradient all-reduce itself.
+  mesh = Mesh(np.array(devices), ("batch",))
+  batch_sharding = NamedSharding(mesh, PartitionSpec(*((None,)*batch_axis + ("batch",))))
+  replicated = NamedSharding(mesh, PartitionSpec())
+
+  def device_put(x):
+    if x.ndim <= batch_axis or x.shape[batch_axis]%len(devices) != 0:
+      return jax.device_put(x, replicated)
+    return jax.device_put(x, batch_sharding)
+
+  return device_put
+
+def prefetch_to_device(iterator, size=2, batch_axis=0):
+  # Keep a few batches on the device ahead of time so that the host to device
+  # copy of the next batch overlaps with the computation on the current one.
+  queue = collections.deque()
+  device_put = get_device_put(batch_axis)
+
+  def enqueue(n):
+    for data in itertools.islice(iterator, n):
+      queue.append(jax.tree_map(device_put, data))
+
+  enqueue(size)
+  while queue:
+    yield queue.popleft()
+    enqueue(1)
+
+################################################################################################################
 
 def get_tf_dataset(*,
                    quantize_bits,
@@ -102,7 +146,7 @@ def get_tf_dataset(*,
 
   ds = ds.prefetch(tf.data.experimental.AUTOTUNE)
   ds = ds.as_numpy_iterator()
-  return ds
+  return prefetch_to_device(ds, batch_axis=0 if n_batches is None else 1)
 
 ################################################################################################################
 
@@ -293,7 +337,7 @@ def get_regular_dataset(data,
     n_random_labels = int(labels.shape[0]*random_label_percent)
     random_indices = random.randint(k1, minval=0, maxval=labels.shape[0], shape=(n_random_labels,))
     random_labels = random.randint(k2, minval=0, maxval=n_classes, shape=(n_random_labels,))
-    labels = jax.ops.index_update(labels, random_indices, random_labels)
+    labels = labels.at[random_indices].set(random_labels)
 
   # Mask some of the labels
   if classification:
@@ -305,9 +349,21 @@ def get_regular_dataset(data,
     if key is None:
       key = random.PRNGKey(0)
 
+    big_batch_size = util.list_prod(batch_shape)
+
+    # Indices of the current epoch that haven't been used yet
+    leftover_idx = jnp.zeros((0,), dtype=jnp.int32)
     while True:
-      key, data_key = random.split(key, 2)
-      batch_idx = random.randint(data_key, minval=0, maxval=n_train, shape=batch_shape)
+      # Stitch together fresh shuffles of the training set.  A big batch
+      # can be larger than the training set, so it can span several epochs.
+      n_perms = -(-(big_batch_size - leftover_idx.shape[0])//n_train)
+      if n_perms > 0:
+        key, *perm_keys = random.split(key, n_perms + 1)
+        epoch_perms = [random.permutation(k, n_train) for k in perm_keys]
+        leftover_idx = jnp.concatenate([leftover_idx] + epoch_perms)
+
+      batch_idx = leftover_idx[:big_batch_size].reshape(batch_shape)
+      leftover_idx = leftover_idx[big_batch_size:]
       data_batch = data[batch_idx]
       inputs = {"x": data_batch}
 
@@ -54,6 +54,16 @@ def train_model(create_model,
                 trainer_fun=None):
   assert args.save_path.endswith(".pickle") == False
 
+  # Make sure that the save_path folder exists
+  pathlib.Path(args.save_path).mkdir(parents=True, exist_ok=True)
+
+  # Cache the compiled train/test loops so that reruns and resumed runs skip compilation.
+  # The cache is set up at the first compile, so this has to happen before anything runs.
+  # Older versions of JAX don't have these options, so only use them when they exist.
+  if "jax_persistent_cache_min_entry_size_bytes" in jax.config.values:
+    jax.config.update("jax_compilation_cache_dir", os.path.join(args.save_path, "jax_cache"))
+    jax.config.update("jax_persistent_cache_min_entry_size_bytes", 0)
+
   init_key  = random.PRNGKey(args.init_key_seed)
   train_key = random.PRNGKey(args.train_key_seed)
   eval_key  = random.PRNGKey(args.eval_key_seed)
@@ -75,9 +85,6 @@ def train_model(create_model,
 
   print("n_params", flow.n_params)
 
-  # Make sure that the save_path folder exists
-  pathlib.Path(args.save_path).mkdir(parents=True, exist_ok=True)
-
   trainer = initialize_trainer(flow,
                                clip=args.clip,
                                lr=args.lr,
@@ -119,47 +126,54 @@ def train(train_key,
   flow = trainer.flow
   trainer.loss(trainer.params, flow.state, train_key, inputs_singly_batched)
 
-  pbar = tqdm.tqdm(jnp.arange(int(max_iters)))
-  for i in pbar:
-
-    train_key, key = random.split(train_key, 2)
-
-    # Perform a bunch of gradient steps
-    inputs = next(train_ds)
-    out = trainer.grad_step_scan_loop(key, inputs)
-    pbar.set_description(trainer.summarize_train_out(out))
-
-    if profile:
-      jax.profiler.save_device_memory_profile(f"memory{i}.prof")
-
-    # Stop if things have diverged
-    if jnp.isnan(trainer.train_losses[-1]):
-      assert 0
-
-    # Evaluate the test set
-    if eval_interval and \
-       (eval_interval == -1 or \
-        trainer.n_train_steps//eval_interval >= len(trainer.test_losses)):
-
-      test_ds = get_test_ds()
-      out = trainer.evaluate_test_set(eval_key, test_ds)
-      print("test", trainer.summarize_test_out(out))
-      del test_ds
-
-    if image:
-      # Save some samples
-      fig, axes = plt.subplots(4, 4); axes = axes.ravel()
-      samples = trainer.flow.sample(eval_key, n_samples=16, generate_image=True)
-      for k, ax in enumerate(axes):
-        ax.imshow(samples["image"][k].squeeze())
-
-      plot_save_folder = os.path.join(save_path, "samples")
-      pathlib.Path(plot_save_folder).mkdir(parents=True, exist_ok=True)
-      plot_save_path = os.path.join(plot_save_folder, f"sample_{trainer.n_train_steps}.png")
-      plt.savefig(plot_save_path)
-      plt.close()
-
-    # Save the model
-    if save_path is not None:
-      model_save_path = os.path.join(save_path, f"model.pickle")
-      trainer.save(model_save_path)
\ No newline at end of file
+  try:
+    pbar = tqdm.tqdm(range(int(max_iters)))
+    for i in pbar:
+
+      train_key, key = random.split(train_key, 2)
+
+      # Perform a bunch of gradient steps
+      out = trainer.grad_step_scan_loop(key, inputs)
+
+      # The steps are dispatched asynchronously, so load the next batch
+      # before blocking on the outputs of this one.
+      inputs = next(train_ds)
+      pbar.set_description(trainer.summarize_train_out(out))
+
+      if profile:
+        jax.profiler.save_device_memory_profile(f"memory{i}.prof")
+
+      # Stop if things have diverged
+      if jnp.isnan(trainer.train_losses[-1]):
+        assert 0
+
+      # Evaluate the test set
+      if eval_interval and \
+         (eval_interval == -1 or \
+          trainer.n_train_steps//eval_interval >= len(trainer.test_losses)):
+
+        test_ds = get_test_ds()
+        out = trainer.evaluate_test_set(eval_key, test_ds)
+        print("test", trainer.summarize_test_out(out))
+        del test_ds
+
+      if image:
+        # Save some samples
+        fig, axes = plt.subplots(4, 4); axes = axes.ravel()
+        samples = trainer.flow.sample(eval_key, n_samples=16, generate_image=True)
+        for k, ax in enumerate(axes):
+          ax.imshow(samples["image"][k].squeeze())
+
+        plot_save_folder = os.path.join(save_path, "samples")
+        pathlib.Path(plot_save_folder).mkdir(parents=True, exist_ok=True)
+        plot_save_path = os.path.join(plot_save_folder, f"sample_{trainer.n_train_steps}.png")
+        plt.savefig(plot_save_path)
+        plt.close()
+
+      # Save the model
+      if save_path is not None:
+        model_save_path = os.path.join(save_path, f"model.pickle")
+        trainer.save(model_save_path)
+  finally:
+    # Wait for the last checkpoint write so that any error from it is raised
+    trainer.wait_for_save()
\ No newline at end of file
@@ -1,5 +1,6 @@
 import jax
 import jax.numpy as jnp
+import numpy as np
 import nux.util as util
 from jax import random, vmap
 from functools import partial
@@ -106,8 +107,11 @@ class ShiftScale(InvertibleLayer):
     else:
       outputs["x"] = s*x + b
 
-    log_det = -jnp.log(s).sum()*jnp.ones(self.batch_shape)
-    outputs["log_det"] = log_det
+    # Like ActNorm, each parameter is shared over the axes that we don't scale over,
+    # so count it once for every time it is repeated.
+    n_repeats = util.list_prod(x_shape)//util.list_prod(param_shape)
+    log_det = -jnp.log(s).sum(axis=tuple(range(s.ndim)))*n_repeats
+    outputs["log_det"] = jnp.broadcast_to(log_det, self.batch_shape)
 
     return outputs
 
@@ -286,8 +290,8 @@ class AffineLDU(InvertibleLayer):
     L     = hk.get_parameter("L", shape=(dim, dim), dtype=dtype, init=hk.initializers.RandomNormal(0.01))
     U     = hk.get_parameter("U", shape=(dim, dim), dtype=dtype, init=hk.initializers.RandomNormal(0.01))
     log_d = hk.get_parameter("log_d", shape=(dim,), dtype=dtype, init=jnp.zeros)
-    lower_mask = jnp.ones((dim, dim), dtype=bool)
-    lower_mask = jax.ops.index_update(lower_mask, jnp.triu_indices(dim), False)
+    # The mask only depends on the shape, so build it with numpy as a constant
+    lower_mask = np.tri(dim, k=-1, dtype=bool)
 
     if self.safe_diag:
       d = util.proximal_relu(log_d) + 1e-5
@@ -372,8 +376,6 @@ class AffineSVD(InvertibleLayer):
 
       @self.auto_batch
       def forward(x):
-        O = jnp.eye(x.size) - 2*VT.T@jnp.linalg.inv(VT@VT.T)@VT
-        l = x - 2*VT.T@jnp.linalg.inv(VT@VT.T)@VT@x
         z = util.householder_prod(x, VT)
         z = z*jnp.exp(log_s)
         return util.householder_prod(z, U) + b
@@ -390,5 +392,5 @@ class AffineSVD(InvertibleLayer):
 
       outputs["x"] = inverse(z)
 
-    outputs["log_det"] = log_s.sum()*jnp.ones(self.batch_shape)
+    outputs["log_det"] = jnp.broadcast_to(log_s.sum(axis=-1), self.batch_shape)
     return outputs
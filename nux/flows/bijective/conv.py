@@ -79,13 +79,13 @@ class CircularConv(InvertibleLayer):
       W_fft = fft_double_channel_vmap(W_padded)
 
       if sample == True:
-        z_fft = jnp.einsum('abij,abj->abi', W_fft, image_fft)
+        z_fft = jnp.matmul(W_fft, image_fft[...,None])[...,0]
         z = ifft_channel_vmap(z_fft).real + b
       else:
         # For deconv, we need to invert the W over the channel dims
         W_fft_inv = inv_height_width_vmap(W_fft)
 
-        x_fft = jnp.einsum('abij,abj->abi', W_fft_inv, image_fft)
+        x_fft = jnp.matmul(W_fft_inv, image_fft[...,None])[...,0]
         z = ifft_channel_vmap(x_fft).real
 
       # The log determinant is the log det of the frequencies over the channel dims
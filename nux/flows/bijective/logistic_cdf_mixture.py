@@ -18,38 +18,31 @@ __all__ = ["LogisticMixtureLogit"]
 
 ################################################################################################################
 
-def bisection_body(f, val):
-  x, current_x, current_z, lower, upper, dx, i = val
-
-  gt = current_x > x
-  lt = 1.0 - gt
-
-  new_z = gt*0.5*(current_z + lower) + lt*0.5*(current_z + upper)
-  lower = gt*lower                   + lt*current_z
-  upper = gt*current_z               + lt*upper
-
-  current_z = new_z
-  current_x = f(current_z)
-  dx = current_x - x
-
-  return x, current_x, current_z, lower, upper, dx, i + 1
-
-def bisection(f, lower, upper, x, atol=1e-8, max_iters=10000):
-  # Compute f^{-1}(x) using the bisection method.  f must be monotonic.
-  z = jnp.zeros_like(x)
-
-  def cond_fun(val):
-    x, current_x, current_z, lower, upper, dx, i = val
-
-    max_iters_reached = jnp.where(i > max_iters, True, False)
-    tolerance_achieved = jnp.allclose(dx, 0.0, atol=atol)
-
-    return ~(max_iters_reached | tolerance_achieved)
-
-  val = (x, f(z), z, lower, upper, jnp.ones_like(x)*10.0, 0.0)
-  val = jax.lax.while_loop(cond_fun, partial(bisection_body, f), val)
-  x, current_x, current_z, lower, upper, dx, i = val
-  return current_z
+def newton_body(f, x, val, _):
+  z, fz, dfdz, lower, upper = val
+
+  # Keep track of a bracket around the root in case a Newton step overshoots
+  gt = fz > x
+  lower = jnp.where(gt, lower, z)
+  upper = jnp.where(gt, z, upper)
+
+  # Take a Newton step and fall back to bisection if we leave the bracket
+  new_z = z - (fz - x)/dfdz
+  in_bracket = (new_z >= lower) & (new_z <= upper)
+  z = jnp.where(in_bracket, new_z, 0.5*(lower + upper))
+
+  fz, dfdz = jax.jvp(f, (z,), (jnp.ones_like(z),))
+  return (z, fz, dfdz, lower, upper), None
+
+def newton(f, lower, upper, x, z_init, n_iters=40):
+  # Compute f^{-1}(x) using Newton's method safeguarded by bisection.
+  # f must be elementwise and monotonically increasing.  Use a fixed number
+  # of iterations so that there is no convergence check inside the loop.
+  fz, dfdz = jax.jvp(f, (z_init,), (jnp.ones_like(z_init),))
+  val = (z_init, fz, dfdz, lower, upper)
+  val, _ = jax.lax.scan(partial(newton_body, f, x), val, None, length=n_iters)
+  z, fz, dfdz, lower, upper = val
+  return z
 
 ################################################################################################################
 
@@ -71,18 +64,15 @@ class _MixtureCDFMixin(ABC):
     self.extra = 2 if with_affine_coupling else 0
 
   def split_theta(self, theta):
+    # Use python ints for the split points so that the slices are static
+    n = self.n_components
     if self.with_affine_coupling:
-      weight_logits, means, log_scales, log_s, t = jnp.split(theta, jnp.array([self.n_components,
-                                                                               2*self.n_components,
-                                                                               3*self.n_components,
-                                                                               3*self.n_components + 1]), axis=-1)
-      log_s = util.constrain_log_scale(log_s)
+      weight_logits, means, log_scales, log_s, t = jnp.split(theta, [n, 2*n, 3*n, 3*n + 1], axis=-1)
+      log_s = util.constrain_log_scale(log_s[...,0])
       t = t[...,0]
-      log_s = log_s[...,0]
       return weight_logits, means, log_scales, log_s, t
     else:
-      weight_logits, means, log_scales = jnp.split(theta, jnp.array([self.n_components,
-                                                                     2*self.n_components]), axis=-1)
+      weight_logits, means, log_scales = jnp.split(theta, [n, 2*n], axis=-1)
       return weight_logits, means, log_scales
 
   def safe_init(self, x, weight_logits, means, log_scales, log_s=None, t=None, conditioned_params=False):
@@ -137,7 +127,7 @@ class _MixtureCDFMixin(ABC):
     return weight_logits, means, log_scales
 
   def mixture_forward(self, x, weight_logits, means, log_scales, log_s=None, t=None):
-    # Assume that this function is auto-batched
+    # The parameters can be unbatched and will broadcast against x
     z, elementwise_log_det = self.f_and_elementwise_log_det(weight_logits, means, log_scales, x)
 
     if self.with_affine_coupling:
@@ -147,7 +137,7 @@ class _MixtureCDFMixin(ABC):
     return z, elementwise_log_det
 
   def mixture_inverse(self, z, weight_logits, means, log_scales, log_s=None, t=None):
-    # Assume that this function is auto-batched
+    # The parameters can be unbatched and will broadcast against z
     if self.with_affine_coupling:
       x = z*jnp.exp(log_s) + t
       elementwise_log_det = -log_s
@@ -155,16 +145,37 @@ class _MixtureCDFMixin(ABC):
       x = z
       elementwise_log_det = 0.0
 
-    # If we're outside of this range, then there's a bigger problem in the rest of the network.
-    lower = jnp.zeros_like(x) - 1000
-    upper = jnp.zeros_like(x) + 1000
+    lower, upper, z_init = self.inverse_guess(weight_logits, means, log_scales, x)
+
+    target = x
+    def residual(x):
+      return self.f(weight_logits, means, log_scales, x) - target
 
-    filled_f = partial(self.f, weight_logits, means, log_scales)
-    x = bisection(filled_f, lower, upper, x)
+    def solve(residual, z_init):
+      return newton(residual, lower, upper, jnp.zeros_like(target), z_init)
+
+    def tangent_solve(g, y):
+      # The jacobian is diagonal, so g(1) holds the derivative of every element
+      return y/g(jnp.ones_like(y))
+
+    # Use the implicit function theorem to differentiate instead of backpropagating through the loop
+    x = jax.lax.custom_root(residual, z_init, solve, tangent_solve)
     elementwise_log_det += self.elementwise_log_det(weight_logits, means, log_scales, x)
 
     return x, elementwise_log_det
 
+  def inverse_guess(self, weight_logits, means, log_scales, z):
+    """ Returns a bracket around f^{-1}(z) and an initial guess for the root finder """
+    # If we're outside of this range, then there's a bigger problem in the rest of the network.
+    lower = jnp.zeros_like(z) - 1000
+    upper = jnp.zeros_like(z) + 1000
+
+    # Start from the mean of the dominant mixture component
+    k = jnp.argmax(weight_logits, axis=-1)
+    x_init = jnp.take_along_axis(means, k[...,None], axis=-1)[...,0]
+    x_init = jnp.broadcast_to(x_init, z.shape)
+    return lower, upper, x_init
+
   @abstractmethod
   def f(self, weight_logits, means, log_scales, x):
     pass
@@ -250,11 +261,12 @@ class MixtureCDF(_MixtureCDFMixin, Elementwise):
     init_fun = self.auto_batch(partial(self.safe_init, conditioned_params=conditioned_params), in_axes=in_axes, out_axes=out_axes, expected_depth=1)
     params = init_fun(x, *params)
 
-    # Run the transform
+    # Run the transform.  Everything here is elementwise and the mixture parameters
+    # are on the last axis, so broadcasting takes care of the batch dimensions.
     if sample == False:
-      z, elementwise_log_det = self.auto_batch(self.mixture_forward, in_axes=in_axes, expected_depth=1)(x, *params)
+      z, elementwise_log_det = self.mixture_forward(x, *params)
     else:
-      z, elementwise_log_det = self.auto_batch(self.mixture_inverse, in_axes=in_axes, expected_depth=1)(x, *params)
+      z, elementwise_log_det = self.mixture_inverse(x, *params)
 
     return z, elementwise_log_det
 
@@ -282,26 +294,39 @@ class _LogisticMixtureLogitMixin():
     self.restrict_scales = restrict_scales
     self.safe_diag = safe_diag
 
-  def f(self, weight_logits, means, log_scales, x):
+  def constrain_log_scales(self, log_scales):
     if self.restrict_scales:
       if self.safe_diag == False:
         log_scales = jnp.maximum(-7.0, log_scales)
       else:
         scales = util.proximal_relu(log_scales) + 1e-5
         log_scales = jnp.log(scales)
+    return log_scales
 
+  def f(self, weight_logits, means, log_scales, x):
+    log_scales = self.constrain_log_scales(log_scales)
     return logistic_cdf_mixture_logit(weight_logits, means, log_scales, x)
 
+  def inverse_guess(self, weight_logits, means, log_scales, z):
+    """ The logit of a single logistic cdf is affine, so each component is inverted
+        with x_k = mean_k + scale_k*z.  The mixture cdf is a convex combination of the
+        component cdfs, so f^{-1}(z) lies between the smallest and largest x_k.
+    """
+    log_scales = self.constrain_log_scales(log_scales)
+    xs = means + jnp.exp(log_scales)*z[...,None]
+    lower, upper = xs.min(axis=-1), xs.max(axis=-1)
+
+    # Start from the inverse of the dominant mixture component
+    k = jnp.argmax(weight_logits, axis=-1)
+    k = jnp.broadcast_to(k, xs.shape[:-1])
+    x_init = jnp.take_along_axis(xs, k[...,None], axis=-1)[...,0]
+    return lower, upper, x_init
+
   def elementwise_log_det(self, weight_logits, means, log_scales, x):
     return self.f_and_elementwise_log_det(weight_logits, means, log_scales, x)[1]
 
   def f_and_elementwise_log_det(self, weight_logits, means, log_scales, x):
-    if self.restrict_scales:
-      if self.safe_diag == False:
-        log_scales = jnp.maximum(-7.0, log_scales)
-      else:
-        scales = util.proximal_relu(log_scales) + 1e-5
-        log_scales = jnp.log(scales)
+    log_scales = self.constrain_log_scales(log_scales)
 
     primals = weight_logits, means, log_scales, x
     tangents = jax.tree_map(jnp.zeros_like, primals[:-1]) + (jnp.ones_like(x),)
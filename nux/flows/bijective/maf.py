@@ -85,10 +85,14 @@ class MAF(InvertibleLayer):
           made_outs = made(inputs, rng)
           mu, alpha = made_outs["mu"], made_outs["alpha"]
           w = mu + z*jnp.exp(alpha)
-          x = jax.ops.index_update(x, idx, w[idx])
+          x = x.at[idx].set(w[idx])
           return x, alpha[idx]
 
-        indices = jnp.nonzero(input_sel == (1 + jnp.arange(x.shape[0])[:,None]))[1]
+        # Visit the dimensions in order of their input selection, breaking ties by position.
+        # The keys are unique, so the argsort is stable no matter how JAX sorts.  It gives the
+        # same order as matching every selection value against every dimension.
+        dim_idx = jnp.arange(x.shape[0])
+        indices = jnp.argsort(input_sel*x.shape[0] + dim_idx)
         x, alpha_diag = jax.lax.scan(carry_body, x, indices)
         log_det = -alpha_diag.sum(axis=-1)
         return x, log_det
@@ -69,7 +69,10 @@ class ActNorm(InvertibleLayer):
     else:
       outputs["x"] = jnp.exp(log_s)*x + b
 
-    log_det = jnp.broadcast_to(-log_s, x_shape)
-    outputs["log_det"] = log_det.sum()
+    # Each parameter is shared over the axes that we don't normalize over, so
+    # scale its sum instead of broadcasting it against the whole input.
+    n_repeats = util.list_prod(x_shape)//util.list_prod(param_shape)
+    log_det = -log_s.sum(axis=tuple(range(log_s.ndim)))*n_repeats
+    outputs["log_det"] = jnp.broadcast_to(log_det, self.batch_shape)
 
     return outputs
@@ -1,5 +1,6 @@
 import jax
 import jax.numpy as jnp
+import numpy as np
 import nux.util as util
 from jax import random, vmap
 from functools import partial
@@ -8,6 +9,7 @@ from typing import Optional, Mapping, Callable, Sequence
 from nux.internal.layer import InvertibleLayer
 import nux.util as util
 from jax.scipy.special import logsumexp
+import jax.scipy.linalg
 from haiku._src.typing import PRNGKey
 import nux.vae as vae
 
@@ -35,16 +37,19 @@ class UnitGaussianPrior(InvertibleLayer):
            reconstruction: Optional[bool]=False,
            **kwargs
   ) -> Mapping[str, jnp.ndarray]:
-    @self.auto_batch
-    def unit_gaussian(x):
-      return -0.5*(1/(t**2)*jnp.sum(x.ravel()**2) + x.size*jnp.log(t**2*2*jnp.pi))
-
     x = inputs["x"]
+    x_shape = self.unbatched_input_shapes["x"]
 
     if sample == True and reconstruction == False:
       x = random.normal(rng, x.shape)*t
 
-    log_pz = unit_gaussian(x)
+    # The 2pi part of the normalizing constant only depends on the shape, so compute it
+    # outside of JAX.  t can be anything that broadcasts against x, so reduce it per element.
+    dim = util.list_prod(x_shape)
+    sum_axes = util.last_axes(x_shape)
+    log_t = jnp.broadcast_to(jnp.log(t), x.shape)
+    log_pz = -0.5*jnp.sum(x**2/t**2, axis=sum_axes) - jnp.sum(log_t, axis=sum_axes)
+    log_pz -= 0.5*dim*np.log(2*np.pi)
     outputs = {"x": x, "log_pz": log_pz}
     return outputs
 
@@ -180,27 +185,27 @@ class AffineGaussianPriorDiagCov(InvertibleLayer):
       x = inputs["x"]
       x -= b
 
-      # Compute the posterior natural parameters
-      J = jnp.eye(self.z_dim) + (A.T/diag_cov)@A
-      J_inv = jnp.linalg.inv(J)
+      # Compute the posterior natural parameters.  J is positive definite,
+      # so work with its cholesky factor instead of inverting it.
+      J = np.eye(self.z_dim, dtype=dtype) + (A.T/diag_cov)@A
+      J_chol = jnp.linalg.cholesky(J)
       sigma_inv_x = x/diag_cov
       h = jnp.dot(sigma_inv_x, A)
 
-      # Compute the posterior parameters
-      Sigma_z = J_inv
-      mu_z = jnp.dot(h, Sigma_z)
+      # Compute the posterior mean J^{-1}h
+      h_flat = h.reshape((-1, self.z_dim))
+      mu_z = jax.scipy.linalg.cho_solve((J_chol, True), h_flat.T).T.reshape(h.shape)
 
-      # Sample z
-      Sigma_z_chol = jnp.linalg.cholesky(Sigma_z)
-      noise = random.normal(rng, mu_z.shape)
-      z = mu_z + jnp.dot(noise, Sigma_z_chol.T)
+      # Sample z.  If J = LL^T, then L^{-T}noise has covariance J^{-1}.
+      noise = random.normal(rng, h_flat.shape)
+      noise = jax.scipy.linalg.solve_triangular(J_chol, noise.T, trans="T", lower=True).T
+      z = mu_z + noise.reshape(h.shape)
 
       # Compute the log likelihood contribution
-      J_inv_h = jnp.dot(h, J_inv.T)
-
-      llc = 0.5*jnp.sum(h*J_inv_h, axis=-1)
-      llc -= 0.5*jnp.linalg.slogdet(J)[1]
-      llc -= 0.5*jnp.sum(x*sigma_inv_x, axis=-1)
+      # Contract the quadratic forms directly instead of reducing a product.
+      llc = 0.5*jnp.einsum("...i,...i->...", h, mu_z)
+      llc -= jnp.log(jnp.diag(J_chol)).sum()
+      llc -= 0.5*jnp.einsum("...i,...i->...", x, sigma_inv_x)
       llc -= 0.5*log_diag_cov.sum()
       llc -= 0.5*self.x_dim*jnp.log(2*jnp.pi)
 
@@ -294,17 +299,15 @@ class GMMPrior(InvertibleLayer):
       x = xs*y_one_hot[...,None]
       x = x.sum(axis=-2)
 
-    # Evaluate the log pdf for each mixture component
-    @partial(jax.vmap, in_axes=(0, 0, None))
-    def diag_gaussian(mean, log_diag_cov, x):
-      dx = x - mean
-      log_pdf = jnp.sum(dx**2*jnp.exp(-log_diag_cov), axis=-1)
-      log_pdf += log_diag_cov.sum()
-      log_pdf += x_dim*jnp.log(2*jnp.pi)
-      return -0.5*log_pdf
-
-    # Last axis will be across the mixture components
-    log_pdfs = self.auto_batch(partial(diag_gaussian, means, log_diag_covs))(x)
+    # Evaluate the log pdf for each mixture component by broadcasting the batch
+    # against the components.  Don't expand the quadratic into matrix multiplies;
+    # that cancels badly when x is close to a mean with a small covariance.
+    # Last axis will be across the mixture components.
+    dx = x[...,None,:] - means
+    log_pdfs = jnp.sum(dx**2*jnp.exp(-log_diag_covs), axis=-1)
+    log_pdfs += log_diag_covs.sum(axis=-1)
+    log_pdfs += x_dim*np.log(2*np.pi)
+    log_pdfs = -0.5*log_pdfs
 
     # Make a class prediction
     y_pred = jnp.argmax(log_pdfs, axis=-1)
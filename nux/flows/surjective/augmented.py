@@ -72,6 +72,14 @@ class Padding(InvertibleLayer):
   def big_dim(self):
     return self.input_dim if self.input_dim > self.output_dim else self.output_dim
 
+  def get_flow(self):
+    if hasattr(self, "_flow"):
+      return self._flow
+
+    # Only build the default flow once
+    self._flow = self.flow if self.flow is not None else self.default_flow()
+    return self._flow
+
   def default_flow(self):
 
     def block():
@@ -116,7 +124,7 @@ class Padding(InvertibleLayer):
     assert len(x_shape) == 1, "Only supporting 1d inputs"
 
     log_det = jnp.zeros(self.batch_shape)
-    flow = self.flow if self.flow is not None else self.default_flow()
+    flow = self.get_flow()
     noise_dim = self.big_dim - self.small_dim
 
     if big_to_small:
@@ -203,6 +211,14 @@ class PaddingChannel(InvertibleLayer):
   def big_dim(self):
     return self.input_channel if self.input_channel > self.output_channel else self.output_channel
 
+  def get_flow(self):
+    if hasattr(self, "_flow"):
+      return self._flow
+
+    # Only build the default flow once
+    self._flow = self.flow if self.flow is not None else self.default_flow()
+    return self._flow
+
   def default_flow(self):
 
     def block():
@@ -244,7 +260,7 @@ class PaddingChannel(InvertibleLayer):
     assert len(x_shape) == 3, "Only supporting 3d inputs"
 
     log_det = jnp.zeros(self.batch_shape)
-    flow = self.flow if self.flow is not None else self.default_flow()
+    flow = self.get_flow()
     noise_shape = x_shape[:-1] + (self.big_dim - self.small_dim,)
 
     if big_to_small:
@@ -334,6 +350,14 @@ class PaddingMultiscaleAndChannel(InvertibleLayer):
   def big_channel(self):
     return self.input_channel if self.input_channel > self.output_channel else self.output_channel
 
+  def get_flow(self):
+    if hasattr(self, "_flow"):
+      return self._flow
+
+    # Only build the default flow once
+    self._flow = self.flow if self.flow is not None else self.default_flow()
+    return self._flow
+
   def default_flow(self):
 
     def block():
@@ -375,7 +399,7 @@ class PaddingMultiscaleAndChannel(InvertibleLayer):
     assert len(x_shape) == 3, "Only supporting 3d inputs"
 
     log_det = jnp.zeros(self.batch_shape)
-    flow = self.flow if self.flow is not None else self.default_flow()
+    flow = self.get_flow()
 
     if big_to_small:
 
@@ -1,5 +1,5 @@
 import jax
-from jax import random, jit, vmap, ops
+from jax import random, jit, vmap
 import jax.numpy as jnp
 from functools import partial
 import nux.util as util
@@ -93,8 +93,8 @@ def contruct_from_max_elts(max_elts, non_max_elts, max_idx, non_max_idx):
 
   # Construct the new array
   x_squeeze = jnp.zeros((H, W, C, 4))
-  x_squeeze = ops.index_update(x_squeeze, max_coord, max_elts.ravel())
-  x_squeeze = ops.index_update(x_squeeze, non_max_coord, non_max_elts.ravel())
+  x_squeeze = x_squeeze.at[max_coord].set(max_elts.ravel())
+  x_squeeze = x_squeeze.at[non_max_coord].set(non_max_elts.ravel())
 
   # Unsqueeze the image
   return util.pixel_unsqueeze(x_squeeze)
@@ -1,6 +1,7 @@
 import jax
 from jax import random, jit, vmap
 import jax.numpy as jnp
+import numpy as np
 from functools import partial
 import nux.util as util
 from typing import Optional, Mapping, Callable, Sequence
@@ -8,6 +9,7 @@ from nux.internal.layer import InvertibleLayer
 import haiku as hk
 from haiku._src.typing import PRNGKey
 from jax.scipy.special import gammaln, logsumexp
+import jax.scipy.linalg
 import nux
 import nux.networks as net
 import nux.util.weight_initializers as init
@@ -24,13 +26,15 @@ def logZ(x, A, log_diag_cov):
   log_px -= 0.5*jnp.sum(log_diag_cov)
   log_px -= 0.5*x.shape[-1]*jnp.log(2*jnp.pi)
 
-  # N(h|0,J)|J|
+  # N(h|0,J)|J|.  J is positive definite, so one cholesky factorization
+  # gives both the quadratic form and the log determinant.
   ATdiag_cov = A.T/diag_cov
   h = ATdiag_cov@x
   J = ATdiag_cov@A
-  J_inv = jnp.linalg.inv(J)
-  log_ph = -0.5*jnp.einsum("i,ij,j", h, J_inv, h)
-  log_ph += 0.5*jnp.linalg.slogdet(J)[1] # Add log|J| to the log pdf!
+  J_chol = jnp.linalg.cholesky(J)
+  J_chol_inv_h = jax.scipy.linalg.solve_triangular(J_chol, h, lower=True)
+  log_ph = -0.5*jnp.sum(J_chol_inv_h**2)
+  log_ph += jnp.log(jnp.diag(J_chol)).sum() # Add log|J| to the log pdf!
   log_ph -= 0.5*h.shape[-1]*jnp.log(2*jnp.pi)
 
   return log_px - log_ph
@@ -140,12 +144,12 @@ class RectangularMVP(InvertibleLayer):
     batched_logZ = self.auto_batch(logZ, in_axes=(0, None, 0))
     if sample == True and big_to_small == False:
       if self.reverse_params:
-        likelihood_contribution = -0.5*jnp.linalg.slogdet(self.BBT)[1]
+        likelihood_contribution = -0.5*self.BBT_log_det
       else:
-        likelihood_contribution = 0.5*jnp.linalg.slogdet(self.ATA)[1]
+        likelihood_contribution = 0.5*self.ATA_log_det
     else:
       if self.reverse_params:
-        likelihood_contribution = batched_logZ(mu - gamma_perp, self.B.T, log_diag_cov) + jnp.linalg.slogdet(self.BBT)[1]
+        likelihood_contribution = batched_logZ(mu - gamma_perp, self.B.T, log_diag_cov) + self.BBT_log_det
       else:
         likelihood_contribution = batched_logZ(mu - gamma_perp, self.A, log_diag_cov)
 
@@ -205,13 +209,19 @@ class RectangularMVP(InvertibleLayer):
         self.A = hk.get_parameter("A", shape=(self.big_dim, self.small_dim), dtype=dtype, init=init_fun)
         self.A = util.whiten(self.A)
 
-    # Compute the riemannian metric matrix for later use.
+    # Compute the riemannian metric matrix, its inverse and its log determinant
+    # once for later use.  Factor it with cholesky since it is positive definite.
+    eye = np.eye(self.small_dim, dtype=dtype)
     if self.reverse_params:
-      self.BBT     = self.B@self.B.T
-      self.BBT_inv = jnp.linalg.inv(self.BBT)
+      self.BBT         = self.B@self.B.T
+      BBT_chol         = jnp.linalg.cholesky(self.BBT)
+      self.BBT_inv     = jax.scipy.linalg.cho_solve((BBT_chol, True), eye)
+      self.BBT_log_det = 2*jnp.log(jnp.diag(BBT_chol)).sum()
     else:
-      self.ATA     = self.A.T@self.A
-      self.ATA_inv = jnp.linalg.inv(self.ATA)
+      self.ATA         = self.A.T@self.A
+      ATA_chol         = jnp.linalg.cholesky(self.ATA)
+      self.ATA_inv     = jax.scipy.linalg.cho_solve((ATA_chol, True), eye)
+      self.ATA_log_det = 2*jnp.log(jnp.diag(ATA_chol)).sum()
 
     #######################
 
@@ -10,6 +10,16 @@ from nux.internal.transform import transform_flow
 
 __all__ = ["Flow"]
 
+def _static_kwargs_key(**kwargs):
+  # Cache key for compiled functions that treat kwargs as static.  Returns
+  # None when a value can't be hashed (arrays, dicts, etc.)
+  key = tuple(sorted(kwargs.items()))
+  try:
+    hash(key)
+  except TypeError:
+    return None
+  return key
+
 class Flow():
   """ Convenience class to wrap a Layer class
 
@@ -43,6 +53,8 @@ class Flow():
     self.latent_shape = outputs["x"].shape[len(batch_axes):]
     self.scan_apply_loop = jit(partial(jax.lax.scan, partial(self.scan_body, is_training=True)))
     self.scan_apply_test_loop = jit(partial(jax.lax.scan, partial(self.scan_body, is_training=False)))
+    self._scan_loops = {}
+    self._compiled_applies = {}
 
   def to_bits_per_dim(self, log_likelihood):
     return log_likelihood/util.list_prod(self.data_shape)/jnp.log(2)
@@ -73,12 +85,24 @@ class Flow():
   def _apply_fun(self):
     return self._flow.apply
 
+  def get_compiled_apply(self, **kwargs):
+    # The kwargs (sample, is_training, etc.) are static, so compile once for each setting
+    apply_key = _static_kwargs_key(**kwargs)
+    if apply_key is None:
+      # Can't cache on array valued kwargs
+      return partial(self._flow.apply, **kwargs)
+
+    if apply_key not in self._compiled_applies:
+      self._compiled_applies[apply_key] = jit(partial(self._flow.apply, **kwargs))
+    return self._compiled_applies[apply_key]
+
   def apply(self,
             key: PRNGKey,
             inputs: Mapping[str, jnp.ndarray],
             **kwargs
   ) -> Mapping[str, jnp.ndarray]:
-    outputs, self.state = self._flow.apply(self.params, self.state, key, inputs, **kwargs)
+    apply_fun = self.get_compiled_apply(**kwargs)
+    outputs, self.state = apply_fun(self.params, self.state, key, inputs)
     return self.process_outputs(outputs)
 
   def stateful_apply(self,
@@ -99,10 +123,26 @@ class Flow():
     outputs, state = self.stateful_apply(key, _inputs, params, state, **kwargs)
     return (params, state), outputs
 
+  def get_scan_loop(self, is_training: bool=True, **kwargs):
+    if len(kwargs) == 0:
+      return self.scan_apply_loop if is_training else self.scan_apply_test_loop
+
+    # Extra kwargs (like sample=True) are static, so compile a loop for each setting
+    body = partial(self.scan_body, is_training=is_training, **kwargs)
+    loop_key = _static_kwargs_key(is_training=is_training, **kwargs)
+    if loop_key is None:
+      # Can't cache on array valued kwargs
+      return jit(partial(jax.lax.scan, body))
+
+    if loop_key not in self._scan_loops:
+      self._scan_loops[loop_key] = jit(partial(jax.lax.scan, body))
+    return self._scan_loops[loop_key]
+
   def scan_apply(self,
                  key: PRNGKey,
                  inputs: Mapping[str, jnp.ndarray],
-                 is_training: bool=True
+                 is_training: bool=True,
+                 **kwargs
   ) -> Mapping[str, jnp.ndarray]:
     """ Applies a lax.scan loop to the first batch axis
     """
@@ -114,11 +154,9 @@ class Flow():
     keys = random.split(key, n_iters)
     scan_inputs = (keys, inputs)
     scan_carry = (self.params, self.state)
-    if is_training:
-      (_, self.state), outputs = self.scan_apply_loop(scan_carry, scan_inputs)
-    else:
-      (_, self.state), outputs = self.scan_apply_test_loop(scan_carry, scan_inputs)
-    return self.process_outputs(outputs)
+    scan_loop = self.get_scan_loop(is_training=is_training, **kwargs)
+    (_, self.state), outputs = scan_loop(scan_carry, scan_inputs)
+    return outputs
 
   #############################################################################
 
@@ -134,8 +172,8 @@ class Flow():
       outputs = self.apply(key, {"x": dummy_z}, sample=True, is_training=False, **kwargs)
     else:
       dummy_z = jnp.zeros((n_batches, n_samples) + self.latent_shape)
-      outputs = self.scan_apply_test_loop(key, {"x": dummy_z}, sample=True, is_training=False, **kwargs)
-    return self.process_outputs(outputs)
+      outputs = self.scan_apply(key, {"x": dummy_z}, sample=True, is_training=False, **kwargs)
+    return outputs
 
   def reconstruct(self,
                   key: PRNGKey,
@@ -147,7 +185,7 @@ class Flow():
       outputs = self.apply(key, inputs, sample=True, reconstruction=True, is_training=False, **kwargs)
     else:
       outputs = self.scan_apply(key, inputs, sample=True, reconstruction=True, is_training=False, **kwargs)
-    return self.process_outputs(outputs)
+    return outputs
 
   #############################################################################
 
@@ -157,6 +195,8 @@ class Flow():
     util.save_pytree(save_items, path, overwrite=True)
 
   def load(self, path: str=None):
-    loaded_items = util.load_pytree(path)
+    # Move everything onto the device once.  Otherwise the host arrays get copied
+    # over again every time they are passed into a compiled function.
+    loaded_items = jax.device_put(util.load_pytree(path))
     self.params = loaded_items["params"]
     self.state = loaded_items["state"]
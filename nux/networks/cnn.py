@@ -4,6 +4,7 @@ from functools import partial
 import jax
 import haiku as hk
 from nux.internal.layer import Layer
+from nux.networks.se import SqueezeExcitation
 import nux.util as util
 from typing import Optional, Mapping, Callable, Sequence, Any
 import nux.util.weight_initializers as init
@@ -16,6 +17,10 @@ __all__ = ["Conv",
 
 ################################################################################################################
 
+# Initializers don't hold any state, so share them between every Conv
+_DEFAULT_W_INIT = hk.initializers.VarianceScaling(1.0, "fan_avg", "truncated_normal")
+_SMALL_W_INIT   = hk.initializers.RandomNormal(stddev=0.01)
+
 def data_dependent_param_init(x: jnp.ndarray,
                               kernel_shape: Sequence[int],
                               out_channel: int,
@@ -28,7 +33,11 @@ def data_dependent_param_init(x: jnp.ndarray,
                               update_params: bool=True,
                               **conv_kwargs):
   batch_size, H, W, C = x.shape
-  w_shape = kernel_shape + (C, out_channel)
+  feature_group_count = conv_kwargs.get("feature_group_count", 1)
+  w_shape = kernel_shape + (C//feature_group_count, out_channel)
+
+  if parameter_norm in ["spectral_norm", "differentiable_spectral_norm"]:
+    assert feature_group_count == 1, "Spectral norm doesn't support grouped convolutions"
 
   if parameter_norm == "spectral_norm":
     return init.conv_weight_with_spectral_norm(x=x,
@@ -91,6 +100,9 @@ class Conv(Layer):
                zero_init: bool=False,
                max_singular_value: float=0.95,
                max_power_iters: int=1,
+               compute_dtype: Any=None,
+               precision: Any=None,
+               depthwise: bool=False,
                name=None):
     super().__init__(name=name)
     self.out_channel = out_channel
@@ -102,9 +114,9 @@ class Conv(Layer):
     self.stride       = stride
 
     if True or zero_init:
-      self.w_init = hk.initializers.RandomNormal(stddev=0.01)
+      self.w_init = _SMALL_W_INIT
     else:
-      self.w_init = hk.initializers.VarianceScaling(1.0, "fan_avg", "truncated_normal") if w_init is None else w_init
+      self.w_init = _DEFAULT_W_INIT if w_init is None else w_init
     self.b_init = jnp.zeros if b_init is None else b_init
 
     self.use_bias = use_bias
@@ -112,11 +124,21 @@ class Conv(Layer):
     self.lhs_dilation      = lhs_dilation
     self.rhs_dilation      = rhs_dilation
     self.dimension_numbers = ('NHWC', 'HWIO', 'NHWC')
+    self.precision         = precision
+
+    # A depthwise convolution filters each input channel separately.  The
+    # number of groups is set to the number of input channels when we are called.
+    self.depthwise           = depthwise
+    self.feature_group_count = 1
 
     self.transpose = transpose
     self.max_singular_value = max_singular_value
     self.max_power_iters    = max_power_iters
 
+    # Parameters are always stored in float32.  If compute_dtype is set (ex. jnp.bfloat16),
+    # the convolution itself runs in that dtype and the output is cast back.
+    self.compute_dtype = compute_dtype
+
   @property
   def conv_kwargs(self):
     return dict(stride=self.stride,
@@ -125,6 +147,8 @@ class Conv(Layer):
                 rhs_dilation=self.rhs_dilation,
                 dimension_numbers=self.dimension_numbers,
                 transpose=self.transpose,
+                precision=self.precision,
+                feature_group_count=self.feature_group_count,
                 max_singular_value=self.max_singular_value,
                 max_power_iters=self.max_power_iters)
 
@@ -138,6 +162,10 @@ class Conv(Layer):
     assert len(x_shape) == 3
     x = inputs["x"]
 
+    if self.depthwise:
+      self.feature_group_count = x_shape[-1]
+      assert self.out_channel%self.feature_group_count == 0
+
     # Pass a singly batched input to the parameter functions.
     # Don't use autobatching here because we might end up reducing
     x, reshape = self.make_singly_batched(x)
@@ -160,8 +188,12 @@ class Conv(Layer):
     else:
       w = params
 
+    out_dtype = x.dtype
+    if self.compute_dtype is not None:
+      x, w = x.astype(self.compute_dtype), w.astype(self.compute_dtype)
+
     conv_fun = self.auto_batch(util.apply_conv, expected_depth=1, in_axes=(0, None))
-    out = conv_fun(x, w, **self.conv_kwargs)
+    out = conv_fun(x, w, **self.conv_kwargs).astype(out_dtype)
 
     if self.use_bias:
       out += b
@@ -190,10 +222,14 @@ class RepeatedConv(Layer):
                activate_last: bool=False,
                max_singular_value: float=0.95,
                max_power_iters: int=1,
+               compute_dtype: Any=None,
+               depthwise: Optional[Sequence[bool]]=None,
                name=None):
     super().__init__(name=name)
 
     assert len(channel_sizes) == len(kernel_shapes)
+    self.depthwise = [False]*len(channel_sizes) if depthwise is None else depthwise
+    assert len(self.depthwise) == len(channel_sizes)
     self.channel_sizes = channel_sizes
     self.kernel_shapes = kernel_shapes
     self.dropout_rate  = dropout_rate
@@ -211,19 +247,9 @@ class RepeatedConv(Layer):
     self.use_bias = use_bias
     self.max_singular_value = max_singular_value
     self.max_power_iters = max_power_iters
+    self.compute_dtype = compute_dtype
 
-    if nonlinearity == "relu":
-      self.nonlinearity = jax.nn.relu
-    elif nonlinearity == "tanh":
-      self.nonlinearity = jnp.tanh
-    elif nonlinearity == "sigmoid":
-      self.nonlinearity = jax.nn.sigmoid
-    elif nonlinearity == "swish":
-      self.nonlinearity = jax.nn.swish
-    elif nonlinearity == "lipswish":
-      self.nonlinearity = lambda x: jax.nn.swish(x)/1.1
-    else:
-      assert 0, "Invalid nonlinearity"
+    self.nonlinearity = util.get_nonlinearity(nonlinearity)
 
     if normalization == "batch_norm":
       self.norm = lambda name: hk.BatchNorm(name=name, create_scale=True, create_offset=True, decay_rate=0.9, data_format="channels_last")
@@ -262,7 +288,8 @@ class RepeatedConv(Layer):
                 use_bias=self.use_bias,
                 transpose=False,
                 max_singular_value=self.max_singular_value,
-                max_power_iters=self.max_power_iters)
+                max_power_iters=self.max_power_iters,
+                compute_dtype=self.compute_dtype)
 
   def call(self,
            inputs,
@@ -281,46 +308,54 @@ class RepeatedConv(Layer):
     else:
       rngs = random.split(rng, len(self.channel_sizes))
 
-    for i, (rng, out_channel, kernel_shape) in enumerate(zip(rngs, self.channel_sizes, self.kernel_shapes)):
+    # Build the convolutions and normalization layers on the first call only.
+    # They have to be created inside call so that their parameters are scoped
+    # under "~call" like they always have been.
+    if hasattr(self, "convs") == False:
+      self.convs, self.aux_convs = [], []
+      for i, (out_channel, kernel_shape) in enumerate(zip(self.channel_sizes, self.kernel_shapes)):
+        if i == len(self.channel_sizes) - 1 and self.gate == True:
+          out_channel *= 2
+        self.convs.append(Conv(out_channel, kernel_shape, name=f"conv_{i}", depthwise=self.depthwise[i], **self.conv_kwargs))
+        self.aux_convs.append(Conv(self.channel_sizes[i], kernel_shape, name=f"conv_{i}_aux", **self.conv_kwargs))
+
+      self.norms = None
+      if self.norm is not None:
+        self.norms = [self.norm(f"norm_{i}") for i in range(len(self.channel_sizes))]
+
+    for i, (rng, conv, aux_conv) in enumerate(zip(rngs, self.convs, self.aux_convs)):
 
       if i == len(self.channel_sizes) - 1 and self.gate == True:
-        ab = Conv(2*out_channel,
-                  kernel_shape,
-                  name=f"conv_{i}",
-                  **self.conv_kwargs)({"x": x}, is_training=is_training)["x"]
+        ab = conv({"x": x}, is_training=is_training)["x"]
         a, b = jnp.split(ab, 2, axis=-1)
         x = a*jax.nn.sigmoid(b)
       else:
-        x = Conv(out_channel,
-                 kernel_shape,
-                 name=f"conv_{i}",
-                 **self.conv_kwargs)({"x": x}, is_training=is_training)["x"]
+        x = conv({"x": x}, is_training=is_training)["x"]
 
       # Network-in-network
       if aux is not None:
         aux = self.nonlinearity(aux)
-        x += Conv(out_channel,
-                  kernel_shape,
-                  name=f"conv_{i}_aux",
-                  **self.conv_kwargs)({"x": aux}, is_training=is_training)["x"]
+        x += aux_conv({"x": aux}, is_training=is_training)["x"]
 
-      if self.norm is not None:
-        norm = self.auto_batch(self.norm(f"norm_{i}"), expected_depth=1)
+      if self.norms is not None:
+        norm = self.auto_batch(self.norms[i], expected_depth=1)
         x = norm(x, is_training=is_training)
 
       if self.activate_last or i < len(self.channel_sizes) - 1:
         x = self.nonlinearity(x)
 
-        if self.dropout_rate is not None:
-          rate = self.dropout_rate if is_training else 0.0
-          x = hk.dropout(rng, rate, x)
+        # Dropout is the identity at evaluation time, so don't generate a mask for it
+        if self.dropout_rate and is_training:
+          x = hk.dropout(rng, self.dropout_rate, x)
 
     return {"x": x}
 
 ################################################################################################################
 
 class BottleneckConv(RepeatedConv):
-  """ Use if we have a big input channel """
+  """ Use if we have a big input channel.  If separable is True, the middle 3x3
+      convolution is depthwise so that the block is a depthwise separable convolution.
+  """
   def __init__(self,
                hidden_channel: int,
                out_channel: int,
@@ -333,10 +368,13 @@ class BottleneckConv(RepeatedConv):
                activate_last: bool=False,
                max_singular_value: float=0.95,
                max_power_iters: int=1,
+               compute_dtype: Any=None,
+               separable: bool=False,
                name=None):
 
     channel_sizes = [hidden_channel, hidden_channel, out_channel]
     kernel_shapes = [(1, 1), (3, 3), (1, 1)]
+    depthwise     = [False, separable, False]
 
     super().__init__(channel_sizes=channel_sizes,
                      kernel_shapes=kernel_shapes,
@@ -349,6 +387,8 @@ class BottleneckConv(RepeatedConv):
                      activate_last=activate_last,
                      max_singular_value=max_singular_value,
                      max_power_iters=max_power_iters,
+                     compute_dtype=compute_dtype,
+                     depthwise=depthwise,
                      name=name)
 
 class ReverseBottleneckConv(RepeatedConv):
@@ -365,6 +405,7 @@ class ReverseBottleneckConv(RepeatedConv):
                activate_last: bool=False,
                max_singular_value: float=0.95,
                max_power_iters: int=1,
+               compute_dtype: Any=None,
                name=None):
 
     channel_sizes = [hidden_channel, hidden_channel, out_channel]
@@ -381,6 +422,7 @@ class ReverseBottleneckConv(RepeatedConv):
                      activate_last=activate_last,
                      max_singular_value=max_singular_value,
                      max_power_iters=max_power_iters,
+                     compute_dtype=compute_dtype,
                      name=name)
 
 ################################################################################################################
@@ -404,6 +446,8 @@ class CNN(Layer):
                gate_final: bool=True,
                max_singular_value: float=0.95,
                max_power_iters: int=1,
+               compute_dtype: Any=None,
+               separable: bool=False,
                name=None):
     super().__init__(name=name)
 
@@ -416,7 +460,8 @@ class CNN(Layer):
                                   gate=gate,
                                   activate_last=True,
                                   max_singular_value=max_singular_value,
-                                  max_power_iters=max_power_iters)
+                                  max_power_iters=max_power_iters,
+                                  compute_dtype=compute_dtype)
     self.hidden_channel = hidden_channel
     self.parameter_norm = parameter_norm
     self.normalization  = normalization
@@ -434,12 +479,15 @@ class CNN(Layer):
 
     self.max_singular_value = max_singular_value
     self.max_power_iters    = max_power_iters
+    self.compute_dtype      = compute_dtype
 
     self.working_channel = working_channel if working_channel is not None else hidden_channel
 
     if block_type == "bottleneck":
       self.conv_block = BottleneckConv
+      self.conv_block_kwargs["separable"] = separable
     elif block_type == "reverse_bottleneck":
+      assert separable == False, "Only bottleneck blocks can be separable"
       self.conv_block = ReverseBottleneckConv
     else:
       assert 0, "Invalid block type"
@@ -455,38 +503,35 @@ class CNN(Layer):
 
     rngs = random.split(rng, 3*self.n_blocks).reshape((self.n_blocks, 3, -1))
 
-    for i, rng_for_convs in enumerate(rngs):
-      cnn = self.conv_block(out_channel=self.working_channel,
-                            **self.conv_block_kwargs)
+    # Build the blocks and the final convolution on the first call only.  Like
+    # in RepeatedConv, this keeps their parameters under the "~call" scope.
+    if hasattr(self, "blocks") == False:
+      self.blocks = [self.conv_block(out_channel=self.working_channel,
+                                     **self.conv_block_kwargs) for _ in range(self.n_blocks)]
+
+      # Add an extra convolution to change the out channels
+      self.final_conv = Conv(2*self.out_channel if self.gate_final else self.out_channel,
+                             kernel_shape=(1, 1),
+                             stride=(1, 1),
+                             padding="SAME",
+                             parameter_norm=self.parameter_norm,
+                             use_bias=self.use_bias,
+                             zero_init=self.zero_init,
+                             max_singular_value=self.max_singular_value,
+                             max_power_iters=self.max_power_iters,
+                             compute_dtype=self.compute_dtype)
+
+    for i, (rng_for_convs, cnn) in enumerate(zip(rngs, self.blocks)):
       x = cnn({"x": x, "aux": aux}, rng=rng_for_convs, is_training=is_training)["x"]
 
       if self.squeeze_excite:
-        x = nux.SqueezeExcitation(reduce_ratio=4)(x)["x"]
+        x = SqueezeExcitation(reduce_ratio=4)({"x": x})["x"]
 
-    # Add an extra convolution to change the out channels
     if self.gate_final:
-      conv = Conv(2*self.out_channel,
-                  kernel_shape=(1, 1),
-                  stride=(1, 1),
-                  padding="SAME",
-                  parameter_norm=self.parameter_norm,
-                  use_bias=self.use_bias,
-                  zero_init=self.zero_init,
-                  max_singular_value=self.max_singular_value,
-                  max_power_iters=self.max_power_iters)
-      ab = conv({"x": x}, is_training=is_training)["x"]
+      ab = self.final_conv({"x": x}, is_training=is_training)["x"]
       a, b = jnp.split(ab, 2, axis=-1)
       x = a*jax.nn.sigmoid(b)
     else:
-      conv = Conv(self.out_channel,
-                  kernel_shape=(1, 1),
-                  stride=(1, 1),
-                  padding="SAME",
-                  parameter_norm=self.parameter_norm,
-                  use_bias=self.use_bias,
-                  zero_init=self.zero_init,
-                  max_singular_value=self.max_singular_value,
-                  max_power_iters=self.max_power_iters)
-      x = conv({"x": x}, is_training=is_training)["x"]
+      x = self.final_conv({"x": x}, is_training=is_training)["x"]
 
     return {"x": x}
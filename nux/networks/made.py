@@ -31,24 +31,10 @@ class MADE(Layer):
     self.n_components        = n_components
     self.triangular_jacobian = triangular_jacobian
 
-    if nonlinearity == "relu":
-      self.nonlinearity = jax.nn.relu
-    elif nonlinearity == "leaky_relu":
-      self.nonlinearity = partial(jax.nn.leaky_relu, negative_slope=0.1)
-    elif nonlinearity == "tanh":
-      self.nonlinearity = jnp.tanh
-    elif nonlinearity == "sigmoid":
-      self.nonlinearity = jax.nn.sigmoid
-    elif nonlinearity == "swish":
-      self.nonlinearity = jax.nn.swish(x)
-    elif nonlinearity == "lipswish":
-      self.nonlinearity = lambda x: jax.nn.swish(x)/1.1
-    elif nonlinearity == "elu":
-      self.nonlinearity = jax.nn.elu
-    elif nonlinearity == "logistic_logit":
+    if nonlinearity == "logistic_logit":
       self.nonlinearity = net.LogisticLogit(n_components=8)
     else:
-      assert 0, "Invalid nonlinearity"
+      self.nonlinearity = util.get_nonlinearity(nonlinearity)
 
     # Store the dimensions for later
     self.dim = dim
@@ -10,6 +10,10 @@ import nux.util as util
 
 __all__ = ["MLP"]
 
+# Initializers don't hold any state, so share them between every MLP
+_DEFAULT_W_INIT = hk.initializers.VarianceScaling(1.0, "fan_avg", "truncated_normal")
+_SMALL_W_INIT   = hk.initializers.RandomNormal(stddev=0.01)
+
 def data_dependent_param_init(x: jnp.ndarray,
                               out_dim: int,
                               name_suffix: str="",
@@ -82,6 +86,7 @@ class MLP(Layer):
                skip_connection: bool=False,
                max_singular_value: float=0.99,
                max_power_iters: int=1,
+               compute_dtype: Any=None,
                name: str=None):
     super().__init__(name=name)
     self.out_dim         = out_dim
@@ -94,18 +99,11 @@ class MLP(Layer):
     self.max_singular_value = max_singular_value
     self.max_power_iters = max_power_iters
 
-    if nonlinearity == "relu":
-      self.nonlinearity = jax.nn.relu
-    elif nonlinearity == "tanh":
-      self.nonlinearity = jnp.tanh
-    elif nonlinearity == "sigmoid":
-      self.nonlinearity = jax.nn.sigmoid
-    elif nonlinearity == "swish":
-      self.nonlinearity = jax.nn.swish
-    elif nonlinearity == "lipswish":
-      self.nonlinearity = lambda x: jax.nn.swish(x)/1.1
-    else:
-      assert 0, "Invalid nonlinearity"
+    # Parameters are always stored in float32.  If compute_dtype is set (ex. jnp.bfloat16),
+    # the matrix multiplies run in that dtype and accumulate in float32.
+    self.compute_dtype = compute_dtype
+
+    self.nonlinearity = util.get_nonlinearity(nonlinearity)
 
     if normalization == "batch_norm":
       self.norm = lambda name: hk.BatchNorm(name=name, create_scale=True, create_offset=True, decay_rate=0.9, data_format="channels_last")
@@ -130,7 +128,7 @@ class MLP(Layer):
       self.norm = norm
     else:
       self.norm = None
-    self.w_init = hk.initializers.VarianceScaling(1.0, "fan_avg", "truncated_normal") if w_init is None else w_init
+    self.w_init = _DEFAULT_W_INIT if w_init is None else w_init
     self.b_init = jnp.zeros if b_init is None else b_init
 
   def call(self,
@@ -156,7 +154,7 @@ class MLP(Layer):
         w, b = data_dependent_param_init(x,
                                          out_dim,
                                          name_suffix=f"{i}",
-                                         w_init=hk.initializers.RandomNormal(stddev=0.01),
+                                         w_init=_SMALL_W_INIT,
                                          b_init=jnp.zeros,
                                          is_training=is_training,
                                          update_params=update_params,
@@ -176,7 +174,17 @@ class MLP(Layer):
                                          parameter_norm=self.parameter_norm)
       x = reshape(x)
 
-      z = jnp.einsum("...ij,...j->...i", w, x) + b
+      # w is stored as (out_dim, in_dim), so contract against its second axis directly
+      # instead of transposing it.
+      dimension_numbers = (((x.ndim - 1,), (1,)), ((), ()))
+      if self.compute_dtype is None:
+        z = jax.lax.dot_general(x, w, dimension_numbers) + b
+      else:
+        z = jax.lax.dot_general(x.astype(self.compute_dtype),
+                                w.astype(self.compute_dtype),
+                                dimension_numbers,
+                                preferred_element_type=jnp.float32)
+        z = z.astype(x.dtype) + b
 
       if self.norm is not None:
         norm = self.auto_batch(self.norm(f"norm_{i}"), expected_depth=1)
@@ -192,9 +200,9 @@ class MLP(Layer):
         x = z
 
       if i < len(self.layer_sizes) - 1:
-        if self.dropout_rate is not None:
-          rate = self.dropout_rate if is_training else 0.0
-          x = hk.dropout(rng, rate, x)
+        # Dropout is the identity at evaluation time, so don't generate a mask for it
+        if self.dropout_rate and is_training:
+          x = hk.dropout(rng, self.dropout_rate, x)
 
     outputs = {"x": x}
     return outputs
\ No newline at end of file
@@ -28,6 +28,7 @@ class ResNetStep(Layer):
                use_bias: bool=True,
                max_singular_value: float=0.999,
                max_power_iters: int=1,
+               compute_dtype: Any=None,
                name=None):
     super().__init__(name=name)
 
@@ -40,7 +41,8 @@ class ResNetStep(Layer):
                                   use_bias=use_bias,
                                   activate_last=True,
                                   max_singular_value=max_singular_value,
-                                  max_power_iters=max_power_iters)
+                                  max_power_iters=max_power_iters,
+                                  compute_dtype=compute_dtype)
     self.hidden_channel = hidden_channel
     self.parameter_norm = parameter_norm
     self.normalization  = normalization
@@ -56,6 +58,7 @@ class ResNetStep(Layer):
 
     self.max_singular_value = max_singular_value
     self.max_power_iters    = max_power_iters
+    self.compute_dtype      = compute_dtype
 
     if block_type == "bottleneck":
       self.conv_block = BottleneckConv
@@ -103,7 +106,7 @@ class ResNetStep(Layer):
                                                   is_training=is_training)["x"]
 
     if self.squeeze_excite:
-      z = SqueezeExcitation(reduce_ratio=4)(z)["x"]
+      z = SqueezeExcitation(reduce_ratio=4)({"x": z})["x"]
 
     x += z
 
@@ -132,6 +135,7 @@ class ResNet(Layer):
                use_bias: bool=True,
                max_singular_value: float=0.95,
                max_power_iters: int=1,
+               compute_dtype: Any=None,
                name=None):
     super().__init__(name=name)
 
@@ -148,7 +152,8 @@ class ResNet(Layer):
                             gate_final=gate_final,
                             use_bias=use_bias,
                             max_singular_value=max_singular_value,
-                            max_power_iters=max_power_iters)
+                            max_power_iters=max_power_iters,
+                            compute_dtype=compute_dtype)
 
     self.hidden_channel = hidden_channel
     self.parameter_norm = parameter_norm
@@ -166,6 +171,7 @@ class ResNet(Layer):
 
     self.max_singular_value = max_singular_value
     self.max_power_iters    = max_power_iters
+    self.compute_dtype      = compute_dtype
 
   def call(self,
            inputs,
@@ -193,7 +199,8 @@ class ResNet(Layer):
                   padding="SAME",
                   parameter_norm=self.parameter_norm,
                   use_bias=self.use_bias,
-                  zero_init=self.zero_init)
+                  zero_init=self.zero_init,
+                  compute_dtype=self.compute_dtype)
       ab = conv({"x": x}, is_training=is_training)["x"]
       a, b = jnp.split(ab, 2, axis=-1)
       x = a*jax.nn.sigmoid(b)
@@ -204,7 +211,8 @@ class ResNet(Layer):
                   padding="SAME",
                   parameter_norm=self.parameter_norm,
                   use_bias=self.use_bias,
-                  zero_init=self.zero_init)
+                  zero_init=self.zero_init,
+                  compute_dtype=self.compute_dtype)
       x = conv({"x": x}, is_training=is_training)["x"]
 
     return {"x": x}
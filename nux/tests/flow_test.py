@@ -0,0 +1,33 @@
+import jax.numpy as jnp
+from jax import random
+import nux
+
+def create_fun():
+  return nux.sequential(nux.ShiftScale(),
+                        nux.UnitGaussianPrior())
+
+def test_scan_apply_with_array_kwargs():
+  rng = random.PRNGKey(0)
+  doubly_batched_inputs = {"x": random.normal(rng, (2, 4, 3))}
+  inputs = {"x": doubly_batched_inputs["x"][0]}
+  flow = nux.Flow(create_fun, rng, inputs, batch_axes=(0,))
+
+  # Array valued kwargs can't be part of a cache key, so the scan loop isn't cached.
+  # t reaches every layer, so use a 0-d array, which is still unhashable.
+  outputs = flow.scan_apply(rng, doubly_batched_inputs, is_training=False, t=jnp.array(1.0))
+  assert outputs["x"].shape == (2, 4, 3)
+  assert len(flow._scan_loops) == 0
+
+  # Hashable kwargs are still cached
+  flow.scan_apply(rng, doubly_batched_inputs, is_training=False, t=1.0)
+  flow.scan_apply(rng, doubly_batched_inputs, is_training=False, t=1.0)
+  assert len(flow._scan_loops) == 1
+
+  # Same for apply
+  outputs = flow.apply(rng, inputs, is_training=False, t=jnp.array(1.0))
+  assert outputs["x"].shape == (4, 3)
+  assert len(flow._compiled_applies) == 0
+  print("Passed flow kwargs tests")
+
+if __name__ == "__main__":
+  test_scan_apply_with_array_kwargs()
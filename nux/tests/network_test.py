@@ -0,0 +1,56 @@
+from jax import random
+import nux
+from nux.networks.cnn import RepeatedConv, CNN
+
+def param_names_test(create_fun, inputs, rng, expected_names):
+  flow = nux.transform_flow(create_fun)
+  params, state = flow.init(rng, inputs, batch_axes=(0,))
+
+  # The parameter tree has to keep the layout that existing checkpoints were saved with
+  names = set(params.keys())
+  if names != set(expected_names):
+    print("Unexpected parameter names!", sorted(names ^ set(expected_names)))
+    assert 0
+
+  # Saved parameters must load back into a freshly built network
+  outputs, _ = flow.apply(params, state, rng, inputs, is_training=False)
+  assert outputs["x"].shape[-1] == 4
+  print("Passed parameter name tests")
+
+def test_repeated_conv_param_names():
+  rng = random.PRNGKey(0)
+  inputs = {"x": random.normal(rng, (2, 8, 8, 3))}
+
+  def create_fun():
+    return RepeatedConv(channel_sizes=[4, 4],
+                        kernel_shapes=[(3, 3), (3, 3)],
+                        normalization="layer_norm",
+                        gate=False,
+                        name="repeated_conv")
+
+  expected_names = ["repeated_conv/~call/conv_0",
+                    "repeated_conv/~call/conv_1",
+                    "repeated_conv/~call/norm_0",
+                    "repeated_conv/~call/norm_1"]
+  param_names_test(create_fun, inputs, rng, expected_names)
+
+def test_cnn_param_names():
+  rng = random.PRNGKey(0)
+  inputs = {"x": random.normal(rng, (2, 8, 8, 3))}
+
+  def create_fun():
+    return CNN(n_blocks=2,
+               hidden_channel=8,
+               out_channel=4,
+               block_type="bottleneck",
+               dropout_rate=None,
+               name="cnn")
+
+  expected_names = ["cnn/~call/conv"]
+  for block in ["bottleneck_conv", "bottleneck_conv_1"]:
+    expected_names += [f"cnn/~call/{block}/~call/conv_{i}" for i in range(3)]
+  param_names_test(create_fun, inputs, rng, expected_names)
+
+if __name__ == "__main__":
+  test_repeated_conv_param_names()
+  test_cnn_param_names()
@@ -27,6 +27,7 @@ class FlowTrainer(ABC):
     self.tester = self.TesterClass(self.params, self.state, self.loss)
 
     self.test_eval_times = jnp.array([])
+    self._save_thread = None
 
   @property
   def train_losses(self):
@@ -97,10 +98,20 @@ class FlowTrainer(ABC):
     save_items.update(train_items)
     save_items.update(test_items)
 
-    util.save_pytree(save_items, path, overwrite=True)
+    # Write the checkpoint in the background so that training can continue
+    self.wait_for_save()
+    self._save_thread = util.save_pytree_async(save_items, path, overwrite=True)
+
+  def wait_for_save(self):
+    # Raises here if the last background save failed
+    if self._save_thread is not None:
+      save_thread, self._save_thread = self._save_thread, None
+      save_thread.join()
 
   def load(self, path: str=None):
-    loaded_items = util.load_pytree(path)
+    self.wait_for_save()
+    # The pickled arrays come back on the host, so transfer them a single time here
+    loaded_items = jax.device_put(util.load_pytree(path))
     self.params = loaded_items["params"]
     self.state = loaded_items["state"]
     self.test_eval_times = loaded_items["test_eval_times"]
@@ -51,6 +51,17 @@ class Evaluate(ABC):
   ) -> Tuple[CompleteState, Output]:
     pass
 
+  def _scan_loop(self,
+                 carry: CompleteState,
+                 key: PRNGKey,
+                 inputs: Mapping[str, jnp.ndarray]
+  ) -> Tuple[CompleteState, Output]:
+    """ Runs a lax.scan of _step over the leading axis of inputs.  The key is split
+        in here so that the whole loop is a single compiled call. """
+    n_iters = inputs["x"].shape[0]
+    keys = random.split(key, n_iters)
+    return jax.lax.scan(self._step, carry, (keys, inputs))
+
   def step(self,
            key: PRNGKey,
            inputs: Mapping[str, jnp.ndarray],
@@ -99,13 +110,8 @@ class Evaluate(ABC):
                      update: bool=True,
                      **kwargs
   ) -> Output:
-    # Get the inputs for the scan loop
-    n_iters = inputs["x"].shape[0]
-    keys = random.split(key, n_iters)
-    scan_inputs = (keys, inputs)
-
     # Run the training steps
-    self.complete_state, out = self.compiled_scan_loop(self.complete_state, scan_inputs)
+    self.complete_state, out = self.compiled_scan_loop(self.complete_state, key, inputs)
     if update:
       self.update_outputs(out)
     return out
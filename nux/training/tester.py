@@ -23,7 +23,7 @@ class Tester(Evaluate):
     self.state = state
 
     self.loss_fun = partial(loss_fun, is_training=False)
-    self.compiled_scan_loop = jit(partial(jax.lax.scan, self._step))
+    self.compiled_scan_loop = jit(self._scan_loop)
 
     self.losses = jnp.array([])
     self.aux = None
@@ -48,7 +48,9 @@ class Trainer(Evaluate):
     self.valgrad = jax.value_and_grad(self.loss_fun, has_aux=True)
     self.valgrad = jit(self.valgrad)
 
-    self.compiled_scan_loop = jit(partial(jax.lax.scan, self._step))
+    # The old params, state and optimizer state are never reused after a step,
+    # so let XLA write the updated values into their buffers.
+    self.compiled_scan_loop = jit(self._scan_loop, donate_argnums=(0,))
 
     self.losses = jnp.array([])
     self.aux = None
@@ -51,8 +51,20 @@ def apply_conv(x: jnp.ndarray,
                rhs_dilation: Sequence[int],
                dimension_numbers: Sequence[str],
                transpose: bool,
+               precision: Any=None,
+               feature_group_count: int=1,
                **kwargs):
 
+  # Only pass the optional arguments when they're used so that older versions
+  # of JAX, which don't have them, still work.
+  conv_kwargs = {}
+  if precision is not None:
+    conv_kwargs["precision"] = precision
+
+  # Accumulate half precision convolutions in float32
+  if jnp.dtype(x.dtype) in (jnp.dtype(jnp.float16), jnp.dtype(jnp.bfloat16)):
+    conv_kwargs["preferred_element_type"] = jnp.float32
+
   if transpose == False:
     return jax.lax.conv_general_dilated(x,
                                         w,
@@ -60,15 +72,19 @@ def apply_conv(x: jnp.ndarray,
                                         padding=padding,
                                         lhs_dilation=lhs_dilation,
                                         rhs_dilation=rhs_dilation,
-                                        dimension_numbers=dimension_numbers)
+                                        dimension_numbers=dimension_numbers,
+                                        feature_group_count=feature_group_count,
+                                        **conv_kwargs)
 
+  assert feature_group_count == 1, "Grouped transpose convolutions aren't supported"
   return jax.lax.conv_transpose(x,
                                 w,
                                 strides=stride,
                                 padding=padding,
                                 rhs_dilation=rhs_dilation,
                                 dimension_numbers=dimension_numbers,
-                                transpose_kernel=True)
+                                transpose_kernel=True,
+                                **conv_kwargs)
 
 ################################################################################################################
 
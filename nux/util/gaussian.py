@@ -1,26 +1,28 @@
 import jax.numpy as jnp
 from jax import jit
 import jax
+import jax.scipy.linalg
+
+def _chol_logpdf(dx, cov_chol):
+  # Whiten dx with a triangular solve.  Works for any number of leading batch dims.
+  dx_flat = dx.reshape((-1, dx.shape[-1]))
+  y = jax.scipy.linalg.solve_triangular(cov_chol, dx_flat.T, lower=True).T
+  log_px = -0.5*jnp.sum(y**2, axis=-1).reshape(dx.shape[:-1])
+  return log_px - jnp.log(jnp.diag(cov_chol)).sum() - 0.5*dx.shape[-1]*jnp.log(2*jnp.pi)
 
 @jit
 def gaussian_chol_cov_logpdf(x, mean, cov_chol):
-  dx = x - mean
-  y = jax.lax_linalg.triangular_solve(cov_chol, dx, lower=True, transpose_a=True)
-  log_px = -0.5*jnp.sum(y**2) - jnp.log(jnp.diag(cov_chol)).sum() - 0.5*x.shape[0]*jnp.log(2*jnp.pi)
-  return log_px
+  return _chol_logpdf(x - mean, cov_chol)
 
+# The covariance is positive definite, so one cholesky factorization gives both
+# the quadratic form and the log determinant without an explicit inverse.
 @jit
 def gaussian_centered_full_cov_logpdf(x, cov):
-  cov_inv = jnp.linalg.inv(cov)
-  log_px = -0.5*jnp.sum(jnp.dot(x, cov_inv.T)*x, axis=-1)
-  return log_px - 0.5*jnp.linalg.slogdet(cov)[1] - 0.5*x.shape[-1]*jnp.log(2*jnp.pi)
+  return _chol_logpdf(x, jnp.linalg.cholesky(cov))
 
 @jit
 def gaussian_full_cov_logpdf(x, mean, cov):
-  dx = x - mean
-  cov_inv = jnp.linalg.inv(cov)
-  log_px = -0.5*jnp.sum(jnp.dot(dx, cov_inv.T)*dx, axis=-1)
-  return log_px - 0.5*jnp.linalg.slogdet(cov)[1] - 0.5*x.shape[-1]*jnp.log(2*jnp.pi)
+  return _chol_logpdf(x - mean, jnp.linalg.cholesky(cov))
 
 @jit
 def gaussian_centered_diag_cov_logpdf(x, log_diag_cov):
@@ -5,7 +5,7 @@ import jax
 
 @jit
 def householder(x, v):
-  return x - 2*jnp.einsum('i,j,j', v, v, x)/jnp.sum(v**2)
+  return x - 2*v*jnp.dot(v, x)/jnp.sum(v**2)
 
 @jit
 def householder_prod_body(carry, inputs):
@@ -7,7 +7,7 @@ def cartesian_to_spherical(x):
   phi = jnp.arccos(x[:-1]/denominators)
 
   last_value = jnp.where(x[-1] >= 0, phi[-1], 2*jnp.pi - phi[-1])
-  phi = jax.ops.index_update(phi, -1, last_value)
+  phi = phi.at[-1].set(last_value)
 
   return jnp.hstack([r, phi])
 
@@ -10,6 +10,15 @@ from jax.scipy.special import logsumexp
 __all__ = ["logistic_cdf_mixture_logit",
            "LogisticLogit"]
 
+def _logsumexp_and_softmax(t):
+  # Subtract the max and exponentiate once, then reuse the result
+  # for both the logsumexp and the softmax.
+  t_max = jnp.max(t, axis=-1, keepdims=True)
+  exp_t = jnp.exp(t - t_max)
+  sum_exp_t = jnp.sum(exp_t, axis=-1, keepdims=True)
+  lse_t = (t_max + jnp.log(sum_exp_t))[...,0]
+  return lse_t, exp_t/sum_exp_t
+
 @jax.custom_jvp
 def logistic_cdf_mixture_logit(weight_logits, means, log_scales, x):
   # weight_logits doesn't have to be normalized with log_softmax!  This normalization
@@ -23,7 +32,7 @@ def logistic_cdf_mixture_logit(weight_logits, means, log_scales, x):
   t2 = t1 - x_hat
 
   t = weight_logits + jnp.concatenate([t1[None], t2[None]], axis=0)
-  lse_t = logsumexp(t, axis=-1)
+  lse_t, _ = _logsumexp_and_softmax(t)
   log_z, log_1mz = lse_t
   z = log_z - log_1mz
   return z
@@ -42,12 +51,11 @@ def jvp(primals, tangents):
 
   t12 = jnp.concatenate([t1[None], t2[None]], axis=0)
   t = weight_logits + t12
-  lse_t = logsumexp(t, axis=-1)
+  lse_t, softmax_t = _logsumexp_and_softmax(t)
   log_z, log_1mz = lse_t
   z = log_z - log_1mz
 
   # dz/dz_score
-  softmax_t = jnp.exp(t - lse_t[...,None])
   softmax_t1, softmax_t2 = softmax_t
   sigma, sigma_bar = jnp.exp(t12)
   dx_hat = softmax_t1*sigma_bar + softmax_t2*sigma
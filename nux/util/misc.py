@@ -54,6 +54,23 @@ def proximal_sigmoid(x, gamma=0.5):
 
 ################################################################################################################
 
+def lipswish(x):
+  return jax.nn.swish(x)/1.1
+
+NONLINEARITIES = {"relu": jax.nn.relu,
+                  "leaky_relu": partial(jax.nn.leaky_relu, negative_slope=0.1),
+                  "tanh": jnp.tanh,
+                  "sigmoid": jax.nn.sigmoid,
+                  "swish": jax.nn.swish,
+                  "lipswish": lipswish,
+                  "elu": jax.nn.elu}
+
+def get_nonlinearity(name):
+  assert name in NONLINEARITIES, "Invalid nonlinearity"
+  return NONLINEARITIES[name]
+
+################################################################################################################
+
 def get_plot_bounds(data):
   (xmin, ymin), (xmax, ymax) = data.min(axis=0), data.max(axis=0)
   xspread, yspread = xmax - xmin, ymax - ymin
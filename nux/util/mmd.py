@@ -19,9 +19,6 @@ def mmd2_estimate(x, y, sigma=0.2):
     kxx = k(x, x)
     kyy = k(y, y)
 
-    diag_idx = jax.ops.index[jnp.diag_indices(x.shape[0])]
-    kxx_no_diag = jax.ops.index_update(kxx, diag_idx, 0.0)
-
     term1 = (kxx.sum() - jnp.diag(kxx).sum())/(N*(N-1))
     term2 = (kyy.sum() - jnp.diag(kyy).sum())/(M*(M-1))
     mmd2 = term1 + term2 - 2*kxy.mean()
@@ -121,11 +121,9 @@ def linear_lr(i, lr=1e-4):
   return lr
 
 def linear_warmup_schedule(i, warmup=1000, lr_decay=1.0):
-  return jnp.where(i < warmup,
-                   i/warmup,
-                   (lr_decay**(i - warmup)))
+  # Branchless for lr_decay <= 1: the warmup ramp is below 1 exactly when
+  # the decay term is still 1, and above it afterwards.
+  return jnp.minimum(i/warmup, lr_decay**jnp.maximum(0, i - warmup))
 
 def linear_warmup_lr_schedule(i, warmup=1000, lr_decay=1.0, lr=1e-4):
-  return jnp.where(i < warmup,
-                   lr*i/warmup,
-                   lr*(lr_decay**(i - warmup)))
+  return lr*linear_warmup_schedule(i, warmup=warmup, lr_decay=lr_decay)
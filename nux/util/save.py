@@ -1,6 +1,9 @@
 # Thanks! https://github.com/google/jax/issues/2116#issuecomment-580322624
 from jax.tree_util import pytree
+import jax
+import os
 import pickle
+import threading
 from pathlib import Path
 from typing import Union
 
@@ -11,13 +14,42 @@ def save_pytree(data: pytree, path: Union[str, Path], overwrite: bool = False):
   if path.suffix != suffix:
     path = path.with_suffix(suffix)
   path.parent.mkdir(parents=True, exist_ok=True)
-  if path.exists():
-    if overwrite:
-      path.unlink()
-    else:
-      raise RuntimeError(f'File {path} already exists.')
-  with open(path, 'wb') as file:
+  if path.exists() and overwrite == False:
+    raise RuntimeError(f'File {path} already exists.')
+
+  # Write to a temporary file first so that an interrupted save never clobbers the old file
+  tmp_path = path.with_name(path.name + '.tmp')
+  with open(tmp_path, 'wb') as file:
     pickle.dump(data, file)
+  os.replace(tmp_path, path)
+
+class _SaveThread(threading.Thread):
+  """ Thread that keeps any exception from the save and re-raises it on join
+  """
+  def __init__(self, *args, **kwargs):
+    super().__init__(*args, **kwargs)
+    self.exception = None
+
+  def run(self):
+    try:
+      super().run()
+    except BaseException as e:
+      self.exception = e
+
+  def join(self, timeout=None):
+    super().join(timeout)
+    if self.exception is not None:
+      exception, self.exception = self.exception, None
+      raise exception
+
+def save_pytree_async(data: pytree, path: Union[str, Path], overwrite: bool = False) -> threading.Thread:
+  # Only the device to host copy happens here.  Pickling and writing to disk
+  # happen in a background thread.  Join the returned thread to wait for the save;
+  # join re-raises anything that went wrong while saving.
+  data = jax.device_get(data)
+  thread = _SaveThread(target=save_pytree, args=(data, path), kwargs=dict(overwrite=overwrite))
+  thread.start()
+  return thread
 
 def load_pytree(path: Union[str, Path]) -> pytree:
   path = Path(path)
@@ -64,7 +64,7 @@ def spectral_norm_apply(W: jnp.ndarray,
     v = jax.lax.stop_gradient(v)
 
   # Estimate the largest singular value of W
-  sigma = jnp.einsum("i,ij,j", u, W, v)
+  sigma = jnp.dot(u, jnp.matmul(W, v))
 
   # Scale coefficient to account for the fact that sigma can be an under-estimate.
   factor = jnp.where(scale < sigma, scale/sigma, 1.0)
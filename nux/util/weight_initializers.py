@@ -1,6 +1,6 @@
 import jax.numpy as jnp
 from jax import jit, random, vmap
-from functools import partial
+from functools import partial, lru_cache
 import jax
 import nux.util as util
 import haiku as hk
@@ -11,6 +11,70 @@ import types
 
 ################################################################################################################
 
+# The matrix vector products are static arguments of the jitted power iterations,
+# so they have to be the same function objects between calls for the compile cache
+# to hit.  They only close over static settings; the weights are always traced.
+_max_singular_value = jax.jit(sn.max_singular_value, static_argnums=(0, 1))
+_max_singular_value_no_grad = jax.jit(sn.max_singular_value_no_grad, static_argnums=(0, 1))
+
+def _dense_mvp(A, x):
+  return A@x
+
+def _dense_mvpT(A, x):
+  return A.T@x
+
+def _hashable_padding(padding):
+  if isinstance(padding, str):
+    return padding
+  return tuple(tuple(p) for p in padding)
+
+@lru_cache(maxsize=None)
+def _conv_mvps(stride, padding):
+
+  def mvp(A, x):
+    return jax.lax.conv_general_dilated(x[None],
+                                        A,
+                                        window_strides=stride,
+                                        padding=padding,
+                                        dimension_numbers=("NHWC", "HWIO", "NHWC"))[0]
+
+  def mvpT(A, x):
+    return jax.lax.conv_transpose(x[None],
+                                  A,
+                                  strides=stride,
+                                  padding=padding,
+                                  dimension_numbers=("NHWC", "HWIO", "NHWC"),
+                                  transpose_kernel=True)[0]
+
+  return mvp, mvpT
+
+@lru_cache(maxsize=None)
+def _i2c_conv_mvps(image_shape, kernel_shape, stride, padding):
+
+  def mvp(A, x):
+    assert x.ndim == 3
+    out = util.apply_im2col_conv(x,
+                                  A,
+                                  filter_shape=kernel_shape,
+                                  stride=stride,
+                                  padding=padding,
+                                  lhs_dilation=(1, 1),
+                                  rhs_dilation=(1, 1),
+                                  dimension_numbers=("NHWC", "HWIO", "NHWC"),
+                                  transpose=False)
+    assert out.ndim == 3
+    return out
+
+  def mvpT(A, y):
+    assert y.ndim == 3
+    input_image = types.SimpleNamespace(shape=image_shape, dtype=jnp.float32)
+    mvpt = jax.linear_transpose(lambda x: mvp(A, x), input_image)
+    out = mvpt(y)[0]
+    assert out.ndim == 3
+    return out
+
+  return mvp, mvpT
+
 def apply_sn(*,
              mvp,
              mvpT,
@@ -42,9 +106,9 @@ def apply_sn(*,
     state = (u,)
 
   if use_proximal_gradient == False:
-    estimate_max_singular_value = jax.jit(sn.max_singular_value, static_argnums=(0, 1))
+    estimate_max_singular_value = _max_singular_value
   else:
-    estimate_max_singular_value = jax.jit(sn.max_singular_value_no_grad, static_argnums=(0, 1))
+    estimate_max_singular_value = _max_singular_value_no_grad
 
   if w_exists == False:
     max_power_iters = 1000
@@ -52,10 +116,22 @@ def apply_sn(*,
   if monitor_progress:
     estimates = []
 
-  for i in range(max_power_iters):
-    sigma, *state = estimate_max_singular_value(mvp, mvpT, w, *state)
-    if monitor_progress:
-      estimates.append(sigma)
+  if w_exists == False and monitor_progress == False:
+    # Run the initial power iterations in a single compiled loop instead of
+    # dispatching each of them separately during data dependent init.
+    def body(i, val):
+      sigma, state = val
+      sigma, *state = estimate_max_singular_value(mvp, mvpT, w, *state)
+      return sigma, tuple(state)
+
+    sigma = jnp.zeros((), dtype)
+    sigma, state = jax.lax.fori_loop(0, max_power_iters, body, (sigma, tuple(state)))
+
+  else:
+    for i in range(max_power_iters):
+      sigma, *state = estimate_max_singular_value(mvp, mvpT, w, *state)
+      if monitor_progress:
+        estimates.append(sigma)
 
   if monitor_progress:
     sigma_for_test = sigma
@@ -118,14 +194,8 @@ def weight_with_good_spectral_norm(x: jnp.ndarray,
   b_shape   = (out_dim,)
   out_shape = (out_dim,)
 
-  def mvp(A, x):
-    return A@x
-
-  def mvpT(A, x):
-    return A.T@x
-
-  return apply_sn(mvp=mvp,
-                  mvpT=mvpT,
+  return apply_sn(mvp=_dense_mvp,
+                  mvpT=_dense_mvpT,
                   w_shape=w_shape,
                   b_shape=b_shape,
                   out_shape=out_shape,
@@ -160,20 +230,7 @@ def conv_weight_with_good_spectral_norm(x: jnp.ndarray,
   b_shape   = (out_channel,)
   out_shape = (H, W, out_channel)
 
-  def mvp(A, x):
-    return jax.lax.conv_general_dilated(x[None],
-                                        A,
-                                        window_strides=stride,
-                                        padding=padding,
-                                        dimension_numbers=("NHWC", "HWIO", "NHWC"))[0]
-
-  def mvpT(A, x):
-    return jax.lax.conv_transpose(x[None],
-                                  A,
-                                  strides=stride,
-                                  padding=padding,
-                                  dimension_numbers=("NHWC", "HWIO", "NHWC"),
-                                  transpose_kernel=True)[0]
+  mvp, mvpT = _conv_mvps(tuple(stride), _hashable_padding(padding))
 
   return apply_sn(mvp=mvp,
                   mvpT=mvpT,
@@ -211,27 +268,7 @@ def i2c_conv_weight_with_good_spectral_norm(x: jnp.ndarray,
   b_shape   = (out_channel,)
   out_shape = (H, W, out_channel)
 
-  def mvp(A, x):
-    assert x.ndim == 3
-    out = util.apply_im2col_conv(x,
-                                  A,
-                                  filter_shape=kernel_shape,
-                                  stride=stride,
-                                  padding=padding,
-                                  lhs_dilation=(1, 1),
-                                  rhs_dilation=(1, 1),
-                                  dimension_numbers=("NHWC", "HWIO", "NHWC"),
-                                  transpose=False)
-    assert out.ndim == 3
-    return out
-
-  def mvpT(A, y):
-    assert y.ndim == 3
-    input_image = types.SimpleNamespace(shape=(H, W, C), dtype=jnp.float32)
-    mvpt = jax.linear_transpose(lambda x: mvp(A, x), input_image)
-    out = mvpt(y)[0]
-    assert out.ndim == 3
-    return out
+  mvp, mvpT = _i2c_conv_mvps((H, W, C), tuple(kernel_shape), tuple(stride), _hashable_padding(padding))
 
   return apply_sn(mvp=mvp,
                   mvpT=mvpT,
@@ -398,7 +435,7 @@ def conv_weight_with_weight_norm(x: jnp.ndarray,
                                  is_training: bool=True,
                                  **conv_kwargs):
   batch_size, H, W, C = x.shape
-  w_shape = kernel_shape + (C, out_channel)
+  w_shape = kernel_shape + (C//conv_kwargs.get("feature_group_count", 1), out_channel)
 
   w = hk.get_parameter("w", w_shape, x.dtype, init=hk.initializers.RandomNormal(stddev=0.05))
   w *= jax.lax.rsqrt((w**2).sum(axis=(0, 1, 2)))[None,None,None,:]